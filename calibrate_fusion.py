@@ -0,0 +1,5 @@
+from cockpit.fusion import main
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
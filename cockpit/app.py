@@ -5,10 +5,12 @@ from queue import Queue
 import cv2
 
 from .camera import capture_worker, create_error_frame, get_latest_or_last, open_camera
-from .config import DETECTION_HZ, DISPLAY_FPS, FONT, HEIGHT, OSD_COLOR, TELEMETRY_HZ, WIDTH, has_gui_display
-from .osd import draw_artificial_horizon, draw_status_banner, draw_tape
+from .catalog import CaptureCatalog
+from .config import DETECTION_HZ, DISPLAY_FPS, HEIGHT, OSD_COLOR, OSD_RENDER_THREAD, TELEMETRY_HZ, WIDTH, has_gui_display
+from .fusion import FusionMapper
+from .osd import OsdLayer, draw_nav_hud, draw_status_banner, osd_worker
 from .simulation import sim_data, update_simulation
-from .yolo import detect_persons, draw_person_detections, load_person_detector, save_person_snapshot
+from .yolo import detect_persons, draw_person_detections, load_person_detector, save_person_snapshot, scale_detections
 
 
 def configure_fullscreen_window(window_name):
@@ -30,9 +32,17 @@ def run():
     person_detection_enabled = False
     person_capture_enabled = False
     nav_hud_enabled = False
+    fusion_enabled = False
+    fusion_mapper = FusionMapper()
     status_text = ""
     status_until = 0.0
 
+    try:
+        capture_catalog = CaptureCatalog()
+    except Exception as exc:
+        print(f"Aviso: nao foi possivel abrir o catalogo de capturas ({exc}); indexacao desativada.")
+        capture_catalog = None
+
     cam2, cam2_source = open_camera(2, "/dev/v4l/by-id/*USB_CAM2*")
     if not cam2:
         print(f"Erro: Nao foi possivel abrir a camera {cam2_source}")
@@ -48,6 +58,9 @@ def run():
     thermal_is_main = sim_data["thermal_is_main"]
     window_name = "FPV Interface Sim"
     last_telemetry_update = 0.0
+    telemetry_version = 0
+    hud_layer = OsdLayer(additive=True)
+    banner_layer = OsdLayer()
     last_display_frame_time = 0.0
     stop_event = threading.Event()
     state_lock = threading.Lock()
@@ -55,6 +68,8 @@ def run():
 
     normal_render_queue = Queue(maxsize=1)
     thermal_render_queue = Queue(maxsize=1)
+    hud_osd_queue = Queue(maxsize=1) if OSD_RENDER_THREAD else None
+    banner_osd_queue = Queue(maxsize=1) if OSD_RENDER_THREAD else None
 
     normal_fallback = create_error_frame((480, 640, 3), "CAMERA 0 ERROR", (80, 40, 40))
     thermal_fallback = create_error_frame((192, 256, 3), "CAMERA 2 ERROR")
@@ -85,6 +100,16 @@ def run():
         thermal_capture_thread.start()
         worker_threads.append(thermal_capture_thread)
 
+    if OSD_RENDER_THREAD:
+        for layer, osd_queue in ((hud_layer, hud_osd_queue), (banner_layer, banner_osd_queue)):
+            osd_thread = threading.Thread(
+                target=osd_worker,
+                args=(layer, osd_queue, stop_event),
+                daemon=True,
+            )
+            osd_thread.start()
+            worker_threads.append(osd_thread)
+
     if gui_enabled:
         try:
             configure_fullscreen_window(window_name)
@@ -108,8 +133,7 @@ def run():
             if current_time - last_telemetry_update >= 1.0 / TELEMETRY_HZ:
                 update_simulation(sim_data, current_time, delta_time)
                 last_telemetry_update = current_time
-
-            dist_m = abs(sim_data["lon"] - sim_data["home_lon"]) * 111111
+                telemetry_version += 1
 
             last_normal_frame = get_latest_or_last(normal_render_queue, last_normal_frame)
             last_thermal_frame = get_latest_or_last(thermal_render_queue, last_thermal_frame)
@@ -120,11 +144,11 @@ def run():
             if thermal_is_main:
                 main_frame = frame_thermal
                 pip_frame = frame_normal
-                pip_frame_resized = cv2.resize(pip_frame, (178, 133))
+                pip_size = (178, 133)
             else:
                 main_frame = frame_normal
                 pip_frame = frame_thermal
-                pip_frame_resized = cv2.resize(pip_frame, (160, 120))
+                pip_size = (160, 120)
 
             if not person_detection_enabled:
                 active_detections = []
@@ -132,43 +156,45 @@ def run():
                 active_detections = detect_persons(main_frame, person_detector)
                 last_detection_time = current_time
 
-            if person_detection_enabled and active_detections:
-                draw_person_detections(main_frame, active_detections)
-
             with state_lock:
                 shared_state["active_detections"] = list(active_detections)
 
-            scene = cv2.resize(main_frame, (WIDTH, HEIGHT))
-            pip_h, pip_w = pip_frame_resized.shape[:2]
-            scene[HEIGHT - pip_h - 10 : HEIGHT - 10, WIDTH - pip_w - 10 : WIDTH - 10] = pip_frame_resized
-            cv2.rectangle(scene, (WIDTH - pip_w - 10, HEIGHT - pip_h - 10), (WIDTH - 10, HEIGHT - 10), OSD_COLOR, 1)
+            scene_detections = []
+            if fusion_enabled:
+                scene = fusion_mapper.fuse(frame_normal, frame_thermal)
+                if person_detection_enabled and active_detections:
+                    scene_detections = fusion_mapper.project_detections(active_detections, from_thermal=thermal_is_main)
+                    draw_person_detections(scene, scene_detections)
+            else:
+                if person_detection_enabled and active_detections:
+                    draw_person_detections(main_frame, active_detections)
+                    scene_detections = scale_detections(active_detections, main_frame.shape)
+
+                scene = cv2.resize(main_frame, (WIDTH, HEIGHT))
+                pip_frame_resized = cv2.resize(pip_frame, pip_size)
+                pip_h, pip_w = pip_frame_resized.shape[:2]
+                scene[HEIGHT - pip_h - 10 : HEIGHT - 10, WIDTH - pip_w - 10 : WIDTH - 10] = pip_frame_resized
+                cv2.rectangle(scene, (WIDTH - pip_w - 10, HEIGHT - pip_h - 10), (WIDTH - 10, HEIGHT - 10), OSD_COLOR, 1)
 
             if nav_hud_enabled:
-                draw_artificial_horizon(scene, sim_data["roll"], sim_data["pitch"], cx=WIDTH // 2, cy=HEIGHT // 2 - 50, radius=100)
-                draw_tape(scene, sim_data["airspeed"], x_pos=40, y_pos=100, width=70, height=HEIGHT - 200, is_vertical=True, color=OSD_COLOR, tick_range=20, step=5)
-                cv2.putText(scene, "IAS", (45, 90), FONT, 0.7, OSD_COLOR, 1)
-                draw_tape(scene, sim_data["altitude"], x_pos=WIDTH - 110, y_pos=100, width=70, height=HEIGHT - 200, is_vertical=True, color=OSD_COLOR, tick_range=50, step=10)
-                cv2.putText(scene, "ALT", (WIDTH - 105, 90), FONT, 0.7, OSD_COLOR, 1)
-                draw_tape(scene, sim_data["heading"], x_pos=150, y_pos=50, width=WIDTH - 300, height=30, is_vertical=False, color=OSD_COLOR, tick_range=60, step=10)
-                cv2.putText(scene, f"M: {sim_data['flight_mode']}", (15, 30), FONT, 0.7, OSD_COLOR, 1)
-                cv2.putText(scene, f"GPS: {sim_data['sats']} SAT", (15, 60), FONT, 0.5, OSD_COLOR, 1)
-                if person_detection_enabled:
-                    cv2.putText(scene, "DET PESSOAS: ON", (15, 90), FONT, 0.6, OSD_COLOR, 2)
-                if person_capture_enabled:
-                    cv2.putText(scene, "PRINT YOLO: ON", (15, 120), FONT, 0.6, OSD_COLOR, 2)
-                cv2.putText(scene, f"{sim_data['batt_volt']:.1f}V", (WIDTH - 100, 30), FONT, 0.7, OSD_COLOR, 1)
-                cv2.putText(scene, f"LAT {sim_data['lat']:.5f}", (15, HEIGHT - 40), FONT, 0.6, OSD_COLOR, 1)
-                cv2.putText(scene, f"LON {sim_data['lon']:.5f}", (15, HEIGHT - 15), FONT, 0.6, OSD_COLOR, 1)
-                cv2.putText(scene, f"H {int(dist_m)}m", (WIDTH // 2 - 40, HEIGHT - 15), FONT, 0.7, OSD_COLOR, 2)
-
-            if person_capture_enabled and active_detections:
-                snapshot_path = save_person_snapshot(scene, active_detections)
+                hud_key = (telemetry_version, person_detection_enabled, person_capture_enabled)
+                hud_layer.request(
+                    hud_osd_queue,
+                    hud_key,
+                    draw_nav_hud,
+                    lambda: (dict(sim_data), person_detection_enabled, person_capture_enabled),
+                )
+                hud_layer.composite(scene)
+
+            if person_capture_enabled and scene_detections:
+                snapshot_path = save_person_snapshot(scene, scene_detections, catalog=capture_catalog, telemetry=sim_data)
                 if snapshot_path is not None:
                     status_text = f"PRINT SALVO: {snapshot_path.name}"
                     status_until = current_time + 2.0
 
             if current_time < status_until and status_text:
-                draw_status_banner(scene, status_text)
+                banner_layer.request(banner_osd_queue, status_text, draw_status_banner, lambda: (status_text,))
+                banner_layer.composite(scene)
 
             if gui_enabled and current_time - last_display_frame_time >= 1.0 / DISPLAY_FPS:
                 try:
@@ -190,6 +216,10 @@ def run():
                 nav_hud_enabled = not nav_hud_enabled
                 status_text = "HUD DE NAVEGACAO ATIVADO" if nav_hud_enabled else "HUD DE NAVEGACAO DESATIVADO"
                 status_until = current_time + 2.0
+            if key == ord("v"):
+                fusion_enabled = not fusion_enabled
+                status_text = "FUSAO TERMICA ATIVADA" if fusion_enabled else "FUSAO TERMICA DESATIVADA"
+                status_until = current_time + 2.0
             if key == ord("f"):
                 fullscreen_enabled = not fullscreen_enabled
                 if gui_enabled:
@@ -218,4 +248,6 @@ def run():
             cam2.release()
         if am1:
             am1.release()
+        if capture_catalog is not None:
+            capture_catalog.close()
         cv2.destroyAllWindows()
@@ -0,0 +1,277 @@
+import argparse
+import json
+import sqlite3
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+
+from .config import CAPTURE_DB_PATH, CAPTURE_DEDUP_DISTANCE, CAPTURE_DEDUP_SECONDS, CAPTURE_DEDUP_WINDOW
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    timestamp REAL NOT NULL,
+    phash TEXT NOT NULL,
+    person_count INTEGER NOT NULL,
+    frame_width INTEGER,
+    frame_height INTEGER,
+    max_confidence REAL,
+    lat REAL,
+    lon REAL,
+    altitude REAL,
+    heading REAL
+);
+CREATE TABLE IF NOT EXISTS detections (
+    capture_id INTEGER NOT NULL REFERENCES captures(id) ON DELETE CASCADE,
+    det_index INTEGER NOT NULL,
+    x1 INTEGER NOT NULL,
+    y1 INTEGER NOT NULL,
+    x2 INTEGER NOT NULL,
+    y2 INTEGER NOT NULL,
+    offset_x INTEGER NOT NULL,
+    offset_y INTEGER NOT NULL,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS idx_captures_timestamp ON captures(timestamp);
+CREATE INDEX IF NOT EXISTS idx_captures_position ON captures(lat, lon);
+CREATE INDEX IF NOT EXISTS idx_captures_person_count ON captures(person_count);
+CREATE INDEX IF NOT EXISTS idx_detections_capture ON detections(capture_id);
+"""
+
+
+def compute_dhash(frame, hash_size=8):
+    if len(frame.shape) == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    diff = small[:, 1:] > small[:, :-1]
+
+    value = 0
+    for bit in diff.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(hash_a, hash_b):
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class CaptureCatalog:
+    def __init__(
+        self,
+        db_path=CAPTURE_DB_PATH,
+        dedup_distance=CAPTURE_DEDUP_DISTANCE,
+        dedup_window=CAPTURE_DEDUP_WINDOW,
+        dedup_seconds=CAPTURE_DEDUP_SECONDS,
+        read_only=False,
+    ):
+        self.db_path = db_path
+        self.dedup_distance = dedup_distance
+        self.dedup_seconds = dedup_seconds
+        self.dedup_enabled = dedup_distance >= 0 and dedup_window > 0 and dedup_seconds > 0
+        self.recent_hashes = deque(maxlen=max(1, dedup_window))
+
+        if read_only:
+            self.connection = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+            self.connection.row_factory = sqlite3.Row
+            return
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.db_path))
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+        if self.dedup_enabled:
+            rows = self.connection.execute(
+                "SELECT timestamp, phash, person_count FROM captures WHERE timestamp >= ? ORDER BY timestamp DESC LIMIT ?",
+                (time.time() - dedup_seconds, dedup_window),
+            ).fetchall()
+            self.recent_hashes.extend(
+                (row["timestamp"], int(row["phash"], 16), row["person_count"]) for row in reversed(rows)
+            )
+
+    def is_duplicate(self, phash, person_count, timestamp):
+        if not self.dedup_enabled:
+            return False
+
+        oldest = timestamp - self.dedup_seconds
+        return any(
+            known_time >= oldest
+            and known_count == person_count
+            and hamming_distance(phash, known_hash) <= self.dedup_distance
+            for known_time, known_hash, known_count in self.recent_hashes
+        )
+
+    def add(self, path, timestamp, detections, phash, telemetry=None, frame_size=None):
+        telemetry = telemetry or {}
+        confidences = [det["confidence"] for det in detections if det.get("confidence") is not None]
+        frame_width, frame_height = frame_size if frame_size is not None else (None, None)
+
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO captures "
+                "(path, timestamp, phash, person_count, frame_width, frame_height, max_confidence, lat, lon, altitude, heading) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(path),
+                    timestamp,
+                    f"{phash:016x}",
+                    len(detections),
+                    frame_width,
+                    frame_height,
+                    max(confidences) if confidences else None,
+                    telemetry.get("lat"),
+                    telemetry.get("lon"),
+                    telemetry.get("altitude"),
+                    telemetry.get("heading"),
+                ),
+            )
+            capture_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO detections (capture_id, det_index, x1, y1, x2, y2, offset_x, offset_y, confidence) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (capture_id, det["index"], *det["bbox"], *det["offset"], det.get("confidence"))
+                    for det in detections
+                ],
+            )
+
+        if self.dedup_enabled:
+            self.recent_hashes.append((timestamp, phash, len(detections)))
+        return capture_id
+
+    def query(self, start=None, end=None, bbox=None, min_persons=None, max_persons=None, limit=None):
+        clauses = []
+        params = []
+
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end)
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            clauses.append("lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?")
+            params.extend([min(min_lat, max_lat), max(min_lat, max_lat), min(min_lon, max_lon), max(min_lon, max_lon)])
+        if min_persons is not None:
+            clauses.append("person_count >= ?")
+            params.append(min_persons)
+        if max_persons is not None:
+            clauses.append("person_count <= ?")
+            params.append(max_persons)
+
+        selection = "SELECT * FROM captures"
+        if clauses:
+            selection += " WHERE " + " AND ".join(clauses)
+        selection += " ORDER BY timestamp"
+        if limit is not None:
+            selection += " LIMIT ?"
+            params.append(limit)
+
+        captures = [dict(row) for row in self.connection.execute(selection, params).fetchall()]
+        if not captures:
+            return []
+
+        by_id = {capture["id"]: capture for capture in captures}
+        for capture in captures:
+            capture["detections"] = []
+
+        detection_rows = self.connection.execute(
+            "SELECT detections.* FROM detections "
+            f"JOIN ({selection}) AS selected ON selected.id = detections.capture_id "
+            "ORDER BY detections.capture_id, detections.det_index",
+            params,
+        ).fetchall()
+        for row in detection_rows:
+            by_id[row["capture_id"]]["detections"].append(
+                {
+                    "index": row["det_index"],
+                    "bbox": (row["x1"], row["y1"], row["x2"], row["y2"]),
+                    "offset": (row["offset_x"], row["offset_y"]),
+                    "confidence": row["confidence"],
+                }
+            )
+
+        return captures
+
+    def close(self):
+        self.connection.close()
+
+
+def parse_time(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_bbox(value):
+    parts = [float(part) for part in value.split(",")]
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("bbox deve ser min_lat,min_lon,max_lat,max_lon")
+    return tuple(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta o catalogo de capturas YOLO.")
+    parser.add_argument("--db", default=str(CAPTURE_DB_PATH), help="caminho do indice SQLite")
+    parser.add_argument("--since", type=parse_time, help="inicio (ISO 8601 ou epoch)")
+    parser.add_argument("--until", type=parse_time, help="fim (ISO 8601 ou epoch)")
+    parser.add_argument("--bbox", type=parse_bbox, help="min_lat,min_lon,max_lat,max_lon")
+    parser.add_argument("--min-persons", type=int)
+    parser.add_argument("--max-persons", type=int)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--json", action="store_true", help="saida em JSON")
+    args = parser.parse_args(argv)
+
+    db_path = Path(args.db)
+    if not db_path.exists():
+        print(f"Erro: catalogo {db_path} nao encontrado.")
+        return 1
+
+    try:
+        catalog = CaptureCatalog(db_path, read_only=True)
+    except sqlite3.Error as exc:
+        print(f"Erro: nao foi possivel abrir o catalogo {db_path} ({exc}).")
+        return 1
+
+    try:
+        captures = catalog.query(
+            start=args.since,
+            end=args.until,
+            bbox=args.bbox,
+            min_persons=args.min_persons,
+            max_persons=args.max_persons,
+            limit=args.limit,
+        )
+    except sqlite3.Error as exc:
+        print(f"Erro: consulta ao catalogo {db_path} falhou ({exc}).")
+        return 1
+    finally:
+        catalog.close()
+
+    if args.json:
+        print(json.dumps(captures, indent=2))
+        return 0
+
+    for capture in captures:
+        when = datetime.fromtimestamp(capture["timestamp"]).isoformat(timespec="milliseconds")
+        confidence = capture["max_confidence"]
+        confidence_text = f"{confidence:.2f}" if confidence is not None else "-"
+        print(
+            f"{when}  P:{capture['person_count']}  conf:{confidence_text}  "
+            f"lat:{capture['lat']}  lon:{capture['lon']}  alt:{capture['altitude']}  hdg:{capture['heading']}  "
+            f"{capture['path']}"
+        )
+    print(f"{len(captures)} captura(s) encontrada(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -37,9 +37,18 @@ YOLO_AUTO_EXPORT = os.getenv("YOLO_AUTO_EXPORT", "0") == "1"
 YOLO_EXPORT_FORMAT = os.getenv("YOLO_EXPORT_FORMAT", "openvino").lower()
 YOLO_DEVICE = os.getenv("YOLO_DEVICE", "cpu")
 CAPTURE_DIR = Path(os.getenv("YOLO_CAPTURE_DIR", "captures"))
+CAPTURE_DB_PATH = Path(os.getenv("YOLO_CAPTURE_DB", str(CAPTURE_DIR / "catalog.sqlite3")))
+CAPTURE_DEDUP_DISTANCE = int(os.getenv("CAPTURE_DEDUP_DISTANCE", "6"))
+CAPTURE_DEDUP_WINDOW = int(os.getenv("CAPTURE_DEDUP_WINDOW", "32"))
+CAPTURE_DEDUP_SECONDS = float(os.getenv("CAPTURE_DEDUP_SECONDS", "10"))
 DISPLAY_FPS = float(os.getenv("DISPLAY_FPS", "30"))
 TELEMETRY_HZ = float(os.getenv("TELEMETRY_HZ", "10"))
 DETECTION_HZ = float(os.getenv("DETECTION_HZ", "2"))
+OSD_RENDER_THREAD = os.getenv("OSD_RENDER_THREAD", "1") == "1"
+FUSION_ALPHA = float(os.getenv("FUSION_ALPHA", "0.45"))
+FUSION_COLORMAP = getattr(cv2, f"COLORMAP_{os.getenv('FUSION_COLORMAP', 'INFERNO').upper()}", cv2.COLORMAP_INFERNO)
+FUSION_CALIBRATION_PATH = Path(os.getenv("FUSION_CALIBRATION_PATH", "fusion_calibration.json"))
+FUSION_CACHE_DIR = Path(os.getenv("FUSION_CACHE_DIR", ".cache/fusion"))
 
 
 def has_gui_display():
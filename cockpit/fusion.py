@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .config import FUSION_ALPHA, FUSION_CACHE_DIR, FUSION_CALIBRATION_PATH, FUSION_COLORMAP, HEIGHT, WIDTH
+from .yolo import transform_detections
+
+
+def load_homography(calibration_path=FUSION_CALIBRATION_PATH):
+    if not calibration_path.exists():
+        return None
+
+    try:
+        data = json.loads(calibration_path.read_text())
+        if "homography" in data:
+            return np.array(data["homography"], dtype=np.float64).reshape(3, 3)
+        if "thermal_points" in data and "visible_points" in data:
+            homography, _ = cv2.findHomography(
+                np.array(data["thermal_points"], dtype=np.float32),
+                np.array(data["visible_points"], dtype=np.float32),
+                cv2.RANSAC,
+            )
+            return homography
+    except Exception as exc:
+        print(f"Aviso: calibracao de fusao invalida em {calibration_path} ({exc}); usando escala simples.")
+    return None
+
+
+def calibrate_homography(thermal_points, visible_points, calibration_path=FUSION_CALIBRATION_PATH):
+    homography, _ = cv2.findHomography(
+        np.array(thermal_points, dtype=np.float32),
+        np.array(visible_points, dtype=np.float32),
+        cv2.RANSAC,
+    )
+    if homography is None:
+        return None
+
+    calibration_path.parent.mkdir(parents=True, exist_ok=True)
+    calibration_path.write_text(json.dumps({"homography": homography.tolist()}, indent=2))
+    return homography
+
+
+def scale_matrix(src_w, src_h, dst_w, dst_h):
+    return np.array([[dst_w / src_w, 0.0, 0.0], [0.0, dst_h / src_h, 0.0], [0.0, 0.0, 1.0]])
+
+
+class FusionMapper:
+    def __init__(self, calibration_path=FUSION_CALIBRATION_PATH, cache_dir=FUSION_CACHE_DIR, alpha=FUSION_ALPHA, colormap=FUSION_COLORMAP):
+        self.homography = load_homography(calibration_path)
+        self.cache_dir = cache_dir
+        self.alpha = alpha
+        self.colormap = colormap
+        self.key = None
+        self.map1 = None
+        self.map2 = None
+        self.outside_mask = None
+        self.thermal_to_scene = np.eye(3)
+        self.visible_to_scene = np.eye(3)
+
+    def ensure_maps(self, thermal_shape, visible_shape, scene_size=(WIDTH, HEIGHT)):
+        th, tw = thermal_shape[:2]
+        vh, vw = visible_shape[:2]
+        key = (th, tw, vh, vw, scene_size)
+        if key == self.key:
+            return
+
+        homography = self.homography if self.homography is not None else scale_matrix(tw, th, vw, vh)
+        self.visible_to_scene = scale_matrix(vw, vh, scene_size[0], scene_size[1])
+        self.thermal_to_scene = self.visible_to_scene @ homography
+
+        digest = hashlib.sha1(repr(("u8mask", key, np.round(self.thermal_to_scene, 9).tolist())).encode()).hexdigest()[:16]
+        cache_path = self.cache_dir / f"remap_{digest}.npz"
+
+        if cache_path.exists():
+            try:
+                with np.load(cache_path) as cached:
+                    self.map1, self.map2, self.outside_mask = cached["map1"], cached["map2"], cached["outside_mask"]
+                self.key = key
+                return
+            except Exception as exc:
+                print(f"Aviso: cache de fusao corrompido em {cache_path} ({exc}); recalculando.")
+
+        scene_w, scene_h = scene_size
+        grid_x, grid_y = np.meshgrid(np.arange(scene_w, dtype=np.float64), np.arange(scene_h, dtype=np.float64))
+        inverse = np.linalg.inv(self.thermal_to_scene)
+        src_x = inverse[0, 0] * grid_x + inverse[0, 1] * grid_y + inverse[0, 2]
+        src_y = inverse[1, 0] * grid_x + inverse[1, 1] * grid_y + inverse[1, 2]
+        src_w = inverse[2, 0] * grid_x + inverse[2, 1] * grid_y + inverse[2, 2]
+        behind = src_w <= 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            map_x = np.where(behind, -1.0, src_x / src_w).astype(np.float32)
+            map_y = np.where(behind, -1.0, src_y / src_w).astype(np.float32)
+
+        outside = behind | (map_x < 0) | (map_x > tw - 1) | (map_y < 0) | (map_y > th - 1)
+        self.outside_mask = outside.astype(np.uint8) * 255
+        self.map1, self.map2 = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+        self.key = key
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            np.savez(cache_path, map1=self.map1, map2=self.map2, outside_mask=self.outside_mask)
+        except OSError as exc:
+            print(f"Aviso: nao foi possivel salvar cache de fusao em {cache_path} ({exc}).")
+
+    def fuse(self, visible_frame, thermal_frame):
+        self.ensure_maps(thermal_frame.shape, visible_frame.shape)
+
+        visible_scene = cv2.resize(visible_frame, (WIDTH, HEIGHT))
+        thermal_gray = cv2.cvtColor(thermal_frame, cv2.COLOR_BGR2GRAY) if thermal_frame.ndim == 3 else thermal_frame
+        thermal_scene = cv2.remap(thermal_gray, self.map1, self.map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+        thermal_color = cv2.applyColorMap(thermal_scene, self.colormap)
+
+        fused = cv2.addWeighted(visible_scene, 1.0 - self.alpha, thermal_color, self.alpha, 0)
+        return cv2.copyTo(visible_scene, self.outside_mask, fused)
+
+    def project_detections(self, detections, from_thermal):
+        matrix = self.thermal_to_scene if from_thermal else self.visible_to_scene
+        return transform_detections(detections, matrix)
+
+
+def parse_points(value):
+    points = [tuple(float(coord) for coord in pair.split(",")) for pair in value.split(";") if pair.strip()]
+    if any(len(point) != 2 for point in points):
+        raise argparse.ArgumentTypeError("pontos devem ser x,y;x,y;...")
+    return points
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibra a homografia termica -> visivel usada na fusao.")
+    parser.add_argument("--thermal-points", type=parse_points, required=True, help="x,y;x,y;... em pixels da camera termica")
+    parser.add_argument("--visible-points", type=parse_points, required=True, help="x,y;x,y;... em pixels da camera visivel")
+    parser.add_argument("--output", default=str(FUSION_CALIBRATION_PATH), help="arquivo JSON de calibracao")
+    args = parser.parse_args(argv)
+
+    if len(args.thermal_points) != len(args.visible_points) or len(args.thermal_points) < 4:
+        print("Erro: informe pelo menos 4 pares de pontos correspondentes.")
+        return 1
+
+    output = Path(args.output)
+    homography = calibrate_homography(args.thermal_points, args.visible_points, output)
+    if homography is None:
+        print("Erro: nao foi possivel estimar a homografia com esses pontos.")
+        return 1
+
+    print(f"Calibracao salva em {output}:")
+    print(np.array2string(homography, precision=6, suppress_small=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,42 +1,56 @@
 import math
+from queue import Empty
 
 import cv2
 import numpy as np
 
-from .config import FONT, OSD_COLOR
+from .camera import put_latest
+from .config import FONT, HEIGHT, OSD_COLOR, WIDTH
 
 
-def draw_artificial_horizon(canvas, roll_deg, pitch_deg, cx, cy, radius):
+def darken_region(canvas, x1, y1, x2, y2, alpha):
+    y1, y2 = max(0, y1), min(canvas.shape[0], y2)
+    x1, x2 = max(0, x1), min(canvas.shape[1], x2)
+    if y1 >= y2 or x1 >= x2:
+        return
+
+    roi = canvas[y1:y2, x1:x2]
+    canvas[y1:y2, x1:x2] = cv2.addWeighted(roi, 1.0 - alpha, np.zeros_like(roi), alpha, 0)
+
+
+def draw_artificial_horizon(canvas, roll_deg, pitch_deg, cx, cy, radius, additive=None):
     roll = math.radians(roll_deg)
     pitch = math.radians(pitch_deg)
+    ladder_canvas = canvas if additive is None else additive
 
     full_cx, full_cy = canvas.shape[1] // 2, canvas.shape[0] // 2
     pixels_per_degree = 4
     pitch_shift_y = int(pitch_deg * pixels_per_degree)
 
-    overlay = np.zeros_like(canvas)
+    overlay = np.zeros(canvas.shape[:2], dtype=np.uint8)
     horizon_center_y = full_cy - pitch_shift_y
-    cv2.line(overlay, (0, horizon_center_y), (canvas.shape[1], horizon_center_y), OSD_COLOR, 2)
+    cv2.line(overlay, (0, horizon_center_y), (canvas.shape[1], horizon_center_y), 255, 2)
 
     for p in range(10, 91, 10):
         line_y = full_cy - int(p * pixels_per_degree) - pitch_shift_y
         if line_y < 0:
             continue
         line_length = 60 if abs(p) % 20 == 0 else 30
-        cv2.line(overlay, (full_cx - line_length, line_y), (full_cx + line_length, line_y), OSD_COLOR, 1)
-        cv2.putText(overlay, str(p), (full_cx + line_length + 5, line_y + 5), FONT, 0.6, OSD_COLOR, 1)
+        cv2.line(overlay, (full_cx - line_length, line_y), (full_cx + line_length, line_y), 255, 1)
+        cv2.putText(overlay, str(p), (full_cx + line_length + 5, line_y + 5), FONT, 0.6, 255, 1)
 
     for p in range(-10, -91, -10):
         line_y = full_cy - int(p * pixels_per_degree) - pitch_shift_y
         if line_y > canvas.shape[0]:
             continue
         line_length = 60 if abs(p) % 20 == 0 else 30
-        cv2.line(overlay, (full_cx - line_length, line_y), (full_cx + line_length, line_y), OSD_COLOR, 1)
-        cv2.putText(overlay, str(p), (full_cx + line_length + 5, line_y + 5), FONT, 0.6, OSD_COLOR, 1)
+        cv2.line(overlay, (full_cx - line_length, line_y), (full_cx + line_length, line_y), 255, 1)
+        cv2.putText(overlay, str(p), (full_cx + line_length + 5, line_y + 5), FONT, 0.6, 255, 1)
 
     matrix = cv2.getRotationMatrix2D((full_cx, full_cy), -roll_deg, 1)
     rotated_overlay = cv2.warpAffine(overlay, matrix, (canvas.shape[1], canvas.shape[0]))
-    canvas[:] = cv2.add(canvas, rotated_overlay)
+    ladder_channels = [cv2.convertScaleAbs(rotated_overlay, alpha=channel / 255.0) for channel in OSD_COLOR]
+    cv2.add(ladder_canvas, cv2.merge(ladder_channels), dst=ladder_canvas)
 
     symbol_arm_length = 50
     symbol_gap = 10
@@ -52,34 +66,14 @@ def draw_artificial_horizon(canvas, roll_deg, pitch_deg, cx, cy, radius):
 def draw_tape(canvas, value, x_pos, y_pos, width, height, is_vertical=True, color=(0, 255, 0), tick_range=50, step=10):
     center_y = y_pos + height // 2
     center_x = x_pos + width // 2
-    alpha = 0.3
-    beta = 1.0 - alpha
-
-    y1, y2 = max(0, y_pos), min(canvas.shape[0], y_pos + height)
-    x1, x2 = max(0, x_pos), min(canvas.shape[1], x_pos + width)
-
-    if y1 < y2 and x1 < x2:
-        roi_tape = canvas[y1:y2, x1:x2]
-        black_overlay = np.zeros_like(roi_tape)
-        blended_roi = cv2.addWeighted(roi_tape, beta, black_overlay, alpha, 0)
-        canvas[y1:y2, x1:x2] = blended_roi
 
+    darken_region(canvas, x_pos, y_pos, x_pos + width, y_pos + height, 0.3)
     cv2.rectangle(canvas, (x_pos, y_pos), (x_pos + width, y_pos + height), color, 1)
 
     alpha_text = 0.5
-    beta_text = 1.0 - alpha_text
 
     if is_vertical:
-        y1_val, y2_val = center_y - 15, center_y + 15
-        x1_val, x2_val = x_pos, x_pos + width + 20
-        y1_val, y2_val = max(0, y1_val), min(canvas.shape[0], y2_val)
-        x1_val, x2_val = max(0, x1_val), min(canvas.shape[1], x2_val)
-
-        if y1_val < y2_val and x1_val < x2_val:
-            roi_val = canvas[y1_val:y2_val, x1_val:x2_val]
-            black_overlay_val = np.zeros_like(roi_val)
-            blended_val = cv2.addWeighted(roi_val, beta_text, black_overlay_val, alpha_text, 0)
-            canvas[y1_val:y2_val, x1_val:x2_val] = blended_val
+        darken_region(canvas, x_pos, center_y - 15, x_pos + width + 20, center_y + 15, alpha_text)
 
         cv2.putText(canvas, f"{int(value):>3}", (x_pos + 5, center_y + 10), FONT, 0.8, color, 2)
         pixels_per_unit = height / tick_range
@@ -92,16 +86,7 @@ def draw_tape(canvas, value, x_pos, y_pos, width, height, is_vertical=True, colo
                     cv2.line(canvas, (x_pos + width - 20, y), (x_pos + width, y), color, 2)
                     cv2.putText(canvas, str(i), (x_pos + 5, y + 5), FONT, 0.5, color, 1)
     else:
-        y1_comp, y2_comp = y_pos - 30, y_pos
-        x1_comp, x2_comp = center_x - 20, center_x + 20
-        y1_comp, y2_comp = max(0, y1_comp), min(canvas.shape[0], y2_comp)
-        x1_comp, x2_comp = max(0, x1_comp), min(canvas.shape[1], x2_comp)
-
-        if y1_comp < y2_comp and x1_comp < x2_comp:
-            roi_comp = canvas[y1_comp:y2_comp, x1_comp:x2_comp]
-            black_overlay_comp = np.zeros_like(roi_comp)
-            blended_comp = cv2.addWeighted(roi_comp, beta_text, black_overlay_comp, alpha_text, 0)
-            canvas[y1_comp:y2_comp, x1_comp:x2_comp] = blended_comp
+        darken_region(canvas, center_x - 20, y_pos - 30, center_x + 20, y_pos, alpha_text)
 
         cv2.putText(canvas, f"{int(value):03}", (center_x - 18, y_pos - 8), FONT, 0.8, color, 2)
         cv2.line(canvas, (center_x, y_pos), (center_x, y_pos + 10), color, 2)
@@ -136,8 +121,103 @@ def draw_status_banner(canvas, text, color=OSD_COLOR):
     x2 = x1 + banner_width
     y2 = y1 + banner_height
 
-    overlay = canvas.copy()
-    cv2.rectangle(overlay, (x1, y1), (x2, y2), (0, 0, 0), -1)
-    canvas[:] = cv2.addWeighted(overlay, 0.45, canvas, 0.55, 0)
+    darken_region(canvas, x1, y1, x2 + 1, y2 + 1, 0.45)
     cv2.rectangle(canvas, (x1, y1), (x2, y2), color, 2)
     cv2.putText(canvas, text, (x1 + 18, y1 + 29), FONT, 0.8, color, 2)
+
+
+def draw_nav_hud(canvas, telemetry, person_detection_enabled, person_capture_enabled, additive=None):
+    dist_m = abs(telemetry["lon"] - telemetry["home_lon"]) * 111111
+
+    draw_artificial_horizon(canvas, telemetry["roll"], telemetry["pitch"], cx=WIDTH // 2, cy=HEIGHT // 2 - 50, radius=100, additive=additive)
+    draw_tape(canvas, telemetry["airspeed"], x_pos=40, y_pos=100, width=70, height=HEIGHT - 200, is_vertical=True, color=OSD_COLOR, tick_range=20, step=5)
+    cv2.putText(canvas, "IAS", (45, 90), FONT, 0.7, OSD_COLOR, 1)
+    draw_tape(canvas, telemetry["altitude"], x_pos=WIDTH - 110, y_pos=100, width=70, height=HEIGHT - 200, is_vertical=True, color=OSD_COLOR, tick_range=50, step=10)
+    cv2.putText(canvas, "ALT", (WIDTH - 105, 90), FONT, 0.7, OSD_COLOR, 1)
+    draw_tape(canvas, telemetry["heading"], x_pos=150, y_pos=50, width=WIDTH - 300, height=30, is_vertical=False, color=OSD_COLOR, tick_range=60, step=10)
+    cv2.putText(canvas, f"M: {telemetry['flight_mode']}", (15, 30), FONT, 0.7, OSD_COLOR, 1)
+    cv2.putText(canvas, f"GPS: {telemetry['sats']} SAT", (15, 60), FONT, 0.5, OSD_COLOR, 1)
+    if person_detection_enabled:
+        cv2.putText(canvas, "DET PESSOAS: ON", (15, 90), FONT, 0.6, OSD_COLOR, 2)
+    if person_capture_enabled:
+        cv2.putText(canvas, "PRINT YOLO: ON", (15, 120), FONT, 0.6, OSD_COLOR, 2)
+    cv2.putText(canvas, f"{telemetry['batt_volt']:.1f}V", (WIDTH - 100, 30), FONT, 0.7, OSD_COLOR, 1)
+    cv2.putText(canvas, f"LAT {telemetry['lat']:.5f}", (15, HEIGHT - 40), FONT, 0.6, OSD_COLOR, 1)
+    cv2.putText(canvas, f"LON {telemetry['lon']:.5f}", (15, HEIGHT - 15), FONT, 0.6, OSD_COLOR, 1)
+    cv2.putText(canvas, f"H {int(dist_m)}m", (WIDTH // 2 - 40, HEIGHT - 15), FONT, 0.7, OSD_COLOR, 2)
+
+
+class OsdLayer:
+    def __init__(self, width=WIDTH, height=HEIGHT, additive=False):
+        self.on_black = np.zeros((height, width, 3), dtype=np.uint8)
+        self.on_white = np.zeros((height, width, 3), dtype=np.uint8)
+        self.additive = np.zeros((height, width, 3), dtype=np.uint8) if additive else None
+        self.key = None
+        self.requested_key = None
+        self.snapshot = None
+
+    def render_on(self, canvas, background, render, args):
+        canvas[:] = background
+        if self.additive is None:
+            render(canvas, *args)
+        else:
+            self.additive[:] = 0
+            render(canvas, *args, additive=self.additive)
+
+    def update(self, key, render, *args):
+        if key == self.key:
+            return False
+
+        self.render_on(self.on_black, 0, render, args)
+        self.render_on(self.on_white, 255, render, args)
+
+        inverse_alpha = cv2.cvtColor(cv2.subtract(self.on_white, self.on_black), cv2.COLOR_BGR2GRAY)
+        additive = self.additive.copy() if self.additive is not None else None
+
+        x, y, w, h = cv2.boundingRect(cv2.bitwise_not(inverse_alpha))
+        if w == 0 or h == 0:
+            self.snapshot, self.key = (None, None, None, additive), key
+            return True
+
+        roi = (slice(y, y + h), slice(x, x + w))
+        roi_inverse_alpha = cv2.cvtColor(inverse_alpha[roi], cv2.COLOR_GRAY2BGR)
+        roi_color = self.on_black[roi].copy()
+        self.snapshot, self.key = (roi, roi_inverse_alpha, roi_color, additive), key
+        return True
+
+    def request(self, render_queue, key, render, make_args):
+        if key == self.requested_key:
+            return False
+
+        self.requested_key = key
+        args = make_args()
+        if render_queue is None:
+            self.update(key, render, *args)
+        else:
+            put_latest(render_queue, (key, render, args))
+        return True
+
+    def composite(self, frame):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return frame
+
+        roi, inverse_alpha, color, additive = snapshot
+        if additive is not None:
+            cv2.add(frame, additive, dst=frame)
+
+        if roi is not None:
+            roi_frame = frame[roi]
+            cv2.multiply(roi_frame, inverse_alpha, dst=roi_frame, scale=1.0 / 255)
+            cv2.add(roi_frame, color, dst=roi_frame)
+        return frame
+
+
+def osd_worker(layer, render_queue, stop_event):
+    while not stop_event.is_set():
+        try:
+            key, render, args = render_queue.get(timeout=0.05)
+        except Empty:
+            continue
+
+        layer.update(key, render, *args)
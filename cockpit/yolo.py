@@ -2,15 +2,19 @@ from datetime import datetime
 from pathlib import Path
 
 import cv2
+import numpy as np
 
 try:
     from ultralytics import YOLO
 except ImportError:
     YOLO = None
 
+from .catalog import compute_dhash
 from .config import (
     CAPTURE_DIR,
+    HEIGHT,
     OSD_COLOR,
+    WIDTH,
     YOLO_AUTO_EXPORT,
     YOLO_CONFIDENCE,
     YOLO_DEVICE,
@@ -128,6 +132,7 @@ def detect_persons(frame, detector):
         if boxes is None or len(boxes) == 0:
             return []
 
+        confidences = boxes.conf.cpu().numpy()
         for index, box in enumerate(boxes.xyxy.cpu().numpy(), start=1):
             x1, y1, x2, y2 = [int(value) for value in box]
             person_x = int((x1 + x2) / 2)
@@ -140,6 +145,7 @@ def detect_persons(frame, detector):
                     "bbox": (x1, y1, x2, y2),
                     "center": (person_x, person_y),
                     "offset": (offset_x, offset_y),
+                    "confidence": float(confidences[index - 1]),
                 }
             )
 
@@ -161,14 +167,59 @@ def draw_person_detections(frame, detections):
         cv2.putText(frame, label, (x1, label_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, OSD_COLOR, 2)
 
 
-def save_person_snapshot(scene, detections, capture_dir=CAPTURE_DIR):
+def transform_detections(detections, matrix, size=(WIDTH, HEIGHT)):
+    center_x, center_y = size[0] // 2, size[1] // 2
+    transformed = []
+
+    for det in detections:
+        x1, y1, x2, y2 = det["bbox"]
+        corners = np.array([[[x1, y1], [x2, y1], [x2, y2], [x1, y2]]], dtype=np.float64)
+        warped = cv2.perspectiveTransform(corners, matrix)[0]
+        tx1, ty1 = [int(value) for value in warped.min(axis=0)]
+        tx2, ty2 = [int(value) for value in warped.max(axis=0)]
+        person_x = int((tx1 + tx2) / 2)
+        person_y = int((ty1 + ty2) / 2)
+        transformed.append(
+            {
+                **det,
+                "bbox": (tx1, ty1, tx2, ty2),
+                "center": (person_x, person_y),
+                "offset": (person_x - center_x, person_y - center_y),
+            }
+        )
+
+    return transformed
+
+
+def scale_detections(detections, frame_shape, size=(WIDTH, HEIGHT)):
+    frame_height, frame_width = frame_shape[:2]
+    matrix = np.diag([size[0] / frame_width, size[1] / frame_height, 1.0])
+    return transform_detections(detections, matrix, size)
+
+
+def save_person_snapshot(scene, detections, capture_dir=CAPTURE_DIR, catalog=None, telemetry=None):
     if not detections:
         return None
 
+    now = datetime.now()
+    grayscale_scene = cv2.cvtColor(scene, cv2.COLOR_BGR2GRAY)
+    phash = None
+    if catalog is not None:
+        phash = compute_dhash(grayscale_scene)
+        if catalog.is_duplicate(phash, len(detections), now.timestamp()):
+            return None
+
     capture_dir.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    timestamp = now.strftime("%Y%m%d_%H%M%S_%f")
     filename = capture_dir / f"person_{timestamp}.jpg"
 
-    grayscale_scene = cv2.cvtColor(scene, cv2.COLOR_BGR2GRAY)
-    cv2.imwrite(str(filename), grayscale_scene, [cv2.IMWRITE_JPEG_QUALITY, 60])
+    if not cv2.imwrite(str(filename), grayscale_scene, [cv2.IMWRITE_JPEG_QUALITY, 60]):
+        return None
+
+    if catalog is not None:
+        try:
+            frame_size = (scene.shape[1], scene.shape[0])
+            catalog.add(filename, now.timestamp(), detections, phash, telemetry, frame_size=frame_size)
+        except Exception as exc:
+            print(f"Aviso: falha ao indexar captura {filename.name} ({exc}).")
     return filename